@@ -1,69 +1,142 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
-import argparse, json
+# Keep module-level imports to the stdlib: stage modules (rich, PIL, requests,
+# language_tool_python) are imported inside the subcommand that needs them so
+# quick actions and `--help` start fast.
+import argparse, json, sys
 from pathlib import Path
-from rich import print
-
-from tools.config import load_config, make_slug
-from tools.outline import build_outline
-from tools.draft import write_book
-from tools.style_pass import style_variation
-from tools.humanize import humanize
-from tools.grammar import grammar_fix
-from tools.make_cover import make_cover
-from tools.export import export_all
-from tools.quality import report as quality_report
-
-def main() -> None:
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--config", required=True)
-    parser.add_argument("--pack", default="")
-    args = parser.parse_args()
 
+COMMANDS = ("build", "export", "quality", "cover", "repetition", "serve")
+
+def _print(*args, **kwargs) -> None:
+    from rich import print as rprint
+    rprint(*args, **kwargs)
+
+def _load(args: argparse.Namespace) -> tuple[dict, Path]:
+    from tools.config import load_config, make_slug
     cfg = load_config(args.config, pack=args.pack)
-    slug = make_slug(cfg["topic"])
-    outdir = Path("books") / slug
+    outdir = Path("books") / make_slug(cfg["topic"])
     outdir.mkdir(parents=True, exist_ok=True)
+    return cfg, outdir
+
+def _read_outline(outdir: Path) -> dict:
+    path = outdir / "outline.json"
+    if not path.exists():
+        sys.exit(f"{path} not found; run `build` first.")
+    return json.loads(path.read_text(encoding="utf-8"))
+
+# -------------------- subcommands --------------------
+def cmd_build(args: argparse.Namespace) -> None:
+    from tools.pipeline import build_book
+    from tools.ollama_client import configure_concurrency, CONTROLLER
+    from tools.routing import stats as routing_stats
+
+    cfg, outdir = _load(args)
+    configure_concurrency(cfg)
+    build_book(
+        cfg, outdir,
+        on_stage=lambda key, label, target: _print(f"[bold]▶ {label}[/bold] → {target}"),
+        on_note=lambda text: _print(f"  {text}"),
+    )
+    _print(f"LLM concurrency: {CONTROLLER.snapshot()}")
+    for task, tiers in routing_stats().items():
+        rates = ", ".join(f"{tier} {c['accepted']}/{c['calls']} ({c['hit_rate']:.0%})" for tier, c in tiers.items())
+        _print(f"Model routing [{task}]: {rates}")
+    _print(f"\n[green]Done.[/green] Output folder: {outdir}\n")
 
-    outline_path = outdir / "outline.json"
-    md_path = outdir / "book.md"
-    refined_path = outdir / "book_refined.md"
-    human_path = outdir / "book_human.md"
+def cmd_export(args: argparse.Namespace) -> None:
+    from tools.export import export_all
+    from tools.cover_derivatives import derivative_path
+    cfg, outdir = _load(args)
     final_path = outdir / "book_final.md"
-    cover_path = outdir / "cover.png"
+    if not final_path.exists():
+        sys.exit(f"{final_path} not found; run `build` first.")
+    _print(f"[bold]▶ Exporting[/bold] → {outdir}")
+    export_all(cfg, final_path, outdir / "cover.png", outdir, epub_cover=derivative_path(cfg, outdir, "epub"))
+
+def cmd_quality(args: argparse.Namespace) -> None:
+    from tools.quality import report as quality_report
+    _, outdir = _load(args)
+    final_path = outdir / "book_final.md"
+    if not final_path.exists():
+        sys.exit(f"{final_path} not found; run `build` first.")
     quality_path = outdir / "quality.json"
+    quality_report(final_path, quality_path)
+    print(quality_path.read_text(encoding="utf-8"))
 
-    print(f"[bold]▶ Generating outline[/bold] → {outline_path}")
-    outline = build_outline(cfg)
-    outline_path.write_text(json.dumps(outline, ensure_ascii=False, indent=2), encoding="utf-8")
+def cmd_cover(args: argparse.Namespace) -> None:
+    from tools.config import load_config, make_slug
+    from tools.cover_derivatives import batch_covers
+    from tools.ollama_client import configure_concurrency
+    jobs = []
+    for config in args.config:
+        cfg = load_config(config, pack=args.pack)
+        outdir = Path("books") / make_slug(cfg["topic"])
+        jobs.append((cfg, _read_outline(outdir), outdir, not args.reuse_master))
+    configure_concurrency(jobs[0][0])  # title condense calls are capped like a build's
+    _print(f"[bold]▶ Covers[/bold] → {len(jobs)} book(s)")
+    for (_, _, outdir, _), derived in zip(jobs, batch_covers(jobs, workers=args.workers)):
+        _print(f"  {outdir}: cover.png + {', '.join(p.name for p in derived.values())}")
 
-    print(f"[bold]▶ Drafting chapters[/bold] → {md_path}")
-    write_book(cfg, outline, md_path)
+def cmd_repetition(args: argparse.Namespace) -> None:
+    from tools.repetition import split_chapters, find_repetition, index_params
+    cfg, outdir = _load(args)
+    path = Path(args.file) if args.file else outdir / "book_final.md"
+    if not path.exists():
+        sys.exit(f"{path} not found; run `build` first.")
+    _, chapters = split_chapters(path.read_text(encoding="utf-8"))
+    dups = find_repetition(chapters, **index_params(cfg))
+    print(json.dumps(dups, ensure_ascii=False, indent=2))
 
-    print(f"[bold]▶ Style pass[/bold] → {refined_path}")
-    style_variation(md_path, refined_path)
+def cmd_serve(args: argparse.Namespace) -> None:
+    from tools.config import load_config
+    from tools.server import serve
+    base = load_config(args.config, pack=args.pack) if args.config else None
+    serve(host=args.host, port=args.port, workers=args.workers, base_cfg=base)
 
-    if cfg.get("humanize", {}).get("enabled", False):
-        print(f"[bold]▶ Humanize[/bold] → {human_path}")
-        humanize(cfg, refined_path, human_path)
-        source_for_grammar = human_path
-    else:
-        source_for_grammar = refined_path
+# -------------------- CLI --------------------
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Local eBook generator (Ollama).")
+    sub = parser.add_subparsers(dest="command", required=True)
 
-    print(f"[bold]▶ Grammar pass[/bold] → {final_path}")
-    grammar_fix(cfg, source_for_grammar, final_path)
+    def add(name: str, fn, help: str) -> argparse.ArgumentParser:
+        p = sub.add_parser(name, help=help)
+        p.add_argument("--config", required=True)
+        p.add_argument("--pack", default="")
+        p.set_defaults(func=fn)
+        return p
 
-    print(f"[bold]▶ Cover[/bold] → {cover_path}")
-    make_cover(cfg, outline, cover_path)
+    add("build", cmd_build, "run the full pipeline (outline → export)")
+    add("export", cmd_export, "re-export book_final.md to EPUB/DOCX/PDF")
+    add("quality", cmd_quality, "recompute and print the quality report")
 
-    print(f"[bold]▶ Quality report[/bold] → {quality_path}")
-    quality_report(final_path, quality_path)
+    p = sub.add_parser("cover", help="re-render cover.png + derived sizes from outline.json (batch: repeat --config)")
+    p.add_argument("--config", required=True, action="append")
+    p.add_argument("--pack", default="")
+    p.add_argument("--workers", type=int, default=0, help="parallel processes (default: CPU count)")
+    p.add_argument("--reuse-master", action="store_true", help="only re-derive sizes from an existing cover.png")
+    p.set_defaults(func=cmd_cover)
+
+    add("repetition", cmd_repetition, "report repeated passages (no regeneration)").add_argument(
+        "--file", default="", help="markdown to scan (default: book_final.md)")
 
-    print(f"[bold]▶ Exporting[/bold]")
-    export_all(cfg, final_path, cover_path, outdir)
+    p = sub.add_parser("serve", help="run the resident job server")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--workers", type=int, default=1, help="books built concurrently")
+    p.add_argument("--config", default="", help="optional config for server-wide concurrency settings")
+    p.add_argument("--pack", default="")
+    p.set_defaults(func=cmd_serve)
+    return parser
 
-    print(f"\n[green]Done.[/green] Output folder: {outdir}\n")
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Backwards compatible: `main.py --config book.yml` means `main.py build --config book.yml`
+    if argv and argv[0] not in COMMANDS and argv[0] not in ("-h", "--help"):
+        argv = ["build"] + argv
+    args = build_parser().parse_args(argv)
+    args.func(args)
 
 if __name__ == "__main__":
     main()
@@ -20,4 +20,4 @@ if [ -f ".venv/bin/activate" ]; then
   source .venv/bin/activate
 fi
 
-python3 main.py --config "$CONFIG" ${PACK:+--pack "$PACK"}
+python3 main.py build --config "$CONFIG" ${PACK:+--pack "$PACK"}
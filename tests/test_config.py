@@ -0,0 +1,13 @@
+from tools.config import DEFAULTS, load_config
+
+
+def _cfg(model: str) -> dict:
+    return load_config({"topic": "t", "audience": "a", "writer_model": model})
+
+
+def test_routing_tiers_are_per_config():
+    a, b = _cfg("m1"), _cfg("m2")
+    assert a["routing"]["tiers"]["writer"] == "m1"
+    assert b["routing"]["tiers"] == {"small": "", "writer": "m2", "refiner": "m2"}
+    assert a["routing"] is not b["routing"]
+    assert DEFAULTS["routing"]["tiers"]["writer"] == ""
@@ -0,0 +1,49 @@
+from tools.draft import _demote_headings
+from tools.humanize import rehumanize_chapter
+from tools.repetition import chapter_number, dedupe, split_chapters
+
+PARA = ("Start each morning by writing down the single task that would make the day a success, "
+        "then block out the first quiet hour on your calendar and protect it from meetings, "
+        "messages and every other small request that tries to sneak in.")
+
+
+def _book(beta: str) -> str:
+    return (f"# B\n\n## 1. Alpha\n\n{PARA}\n\n## 1. Getting started\n\nSubheading text.\n\n"
+            f"## 2. Beta\n\n{beta}\n\n## 3. Gamma\n\nGamma text.\n")
+
+
+def test_numbered_subheading_does_not_split_a_chapter():
+    head, chapters = split_chapters(_book("Beta text."))
+    assert head == "# B\n\n"
+    assert [chapter_number(c) for c in chapters] == [1, 2, 3]
+    assert "## 1. Getting started" in chapters[0]
+
+
+def test_dedupe_regenerates_by_chapter_number(tmp_path):
+    md = tmp_path / "book.md"
+    md.write_text(_book(PARA), encoding="utf-8")
+    calls = []
+
+    def regenerate(n, old, dups):
+        calls.append((n, [d["chapter"] for d in dups]))
+        return f"## {n}. Beta\n\nFresh beta text.\n"
+
+    report = tmp_path / "repetition.json"
+    assert dedupe({"repetition": {"max_rounds": 1}}, md, regenerate, report) == [2]
+    assert calls == [(2, [2])]
+    _, chapters = split_chapters(md.read_text(encoding="utf-8"))
+    assert [c.splitlines()[0] for c in chapters] == ["## 1. Alpha", "## 2. Beta", "## 3. Gamma"]
+    assert "Fresh beta text." in chapters[1]
+
+
+def test_rehumanize_uses_the_real_chapter_source(tmp_path, monkeypatch):
+    src = tmp_path / "book_refined.md"
+    src.write_text(_book("Beta text."), encoding="utf-8")
+    monkeypatch.setattr("tools.humanize.rewrite_chunk", lambda cfg, chunk, avoid="": chunk)
+    out = rehumanize_chapter({"humanize": {"rhetorical_question_rate": 0}}, src)(1, "## 1. Alpha\n\nold", [])
+    assert out.startswith("## 1. Alpha") and "Getting started" in out
+
+
+def test_model_headings_are_demoted():
+    text = "# Title\n## 1. Step one\n```\n## code\n```\n### Keep"
+    assert _demote_headings(text) == "### Title\n### 1. Step one\n```\n## code\n```\n### Keep"
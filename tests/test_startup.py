@@ -0,0 +1,12 @@
+import pytest
+
+from tools.startup_bench import QUICK, imported_heavy_modules, subcommand_heavy_modules
+
+
+def test_import_main_is_light():
+    assert imported_heavy_modules() == []
+
+
+@pytest.mark.parametrize("command", sorted(QUICK))
+def test_quick_subcommand_imports(command):
+    assert subcommand_heavy_modules(command) == []
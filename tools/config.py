@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-import re
+import copy, re
+from functools import lru_cache
 from pathlib import Path
 import yaml
 
@@ -15,6 +16,20 @@ DEFAULTS: dict = {
     "writer_model": "llama3.1:8b-instruct",
     "refiner_model": "",
     "persona": "A knowledgeable but friendly coach.",
+    # Per-task model cascade: try tiers left to right, escalating only when the
+    # task's validator rejects the output. Empty tiers are skipped; writer/refiner
+    # default to writer_model/refiner_model.
+    "routing": {
+        "tiers": {"small": "", "writer": "", "refiner": ""},
+        "tasks": {
+            "outline": ["small", "writer"],
+            "chapter": ["small", "writer"],
+            "humanize": ["small", "refiner"],
+            "title": ["small", "refiner"],
+        },
+        "chapter_word_band": [0.6, 1.6],
+        "humanize_length_band": [0.75, 1.35],
+    },
     "humanize": {
         "enabled": False,
         "rhetorical_question_rate": 0.10,
@@ -23,7 +38,14 @@ DEFAULTS: dict = {
         "read_level": "Grade 8-10",
         "add_checklists": True,
     },
-    "export": {"pdf": True, "epub": True, "docx": True, "pdf_engine": "tectonic"},
+    # In-flight Ollama requests, tuned at runtime by AIMD on observed tokens/sec + latency
+    "concurrency": {"initial": 1, "min": 1, "max": 4, "backoff": 0.7, "tolerance": 0.10, "latency_target": 0},
+    # Near-duplicate paragraph detection (MinHash/LSH) after drafting/humanizing;
+    # only flagged chapters are regenerated, up to max_rounds times
+    "repetition": {"enabled": True, "shingle_size": 5, "num_perm": 96, "bands": 32,
+                   "threshold": 0.5, "min_words": 25, "max_rounds": 1},
+    # epub_engine: auto (pandoc if installed, else native) | native | pandoc; html: native standalone HTML
+    "export": {"pdf": True, "epub": True, "docx": True, "html": False, "epub_engine": "auto", "pdf_engine": "tectonic"},
 }
 
 def make_slug(text: str) -> str:
@@ -41,11 +63,19 @@ def deep_merge(a: dict, b: dict) -> dict:
             out[k] = v
     return out
 
-def load_yaml(path: str | Path) -> dict:
+@lru_cache(maxsize=64)
+def _load_yaml_cached(path: str, mtime_ns: int) -> dict:
     return yaml.safe_load(Path(path).read_text(encoding="utf-8"))
 
-def load_config(path: str, pack: str = "") -> dict:
-    cfg = deep_merge(DEFAULTS, load_yaml(path))
+def load_yaml(path: str | Path) -> dict:
+    # Cached per (path, mtime) so a long-running server doesn't re-parse configs/packs
+    p = Path(path).resolve()
+    return copy.deepcopy(_load_yaml_cached(str(p), p.stat().st_mtime_ns))
+
+def load_config(path: str | dict, pack: str = "") -> dict:
+    data = copy.deepcopy(path) if isinstance(path, dict) else load_yaml(path)
+    # deep_merge shares nested dicts it doesn't override; copy so DEFAULTS is never mutated below
+    cfg = deep_merge(copy.deepcopy(DEFAULTS), data)
     if pack:
         pack_path = Path("packs") / f"{pack}.yaml"
         if pack_path.exists():
@@ -55,4 +85,7 @@ def load_config(path: str, pack: str = "") -> dict:
     cfg["words_per_chapter"] = words_per_chapter
     if not cfg.get("refiner_model"):
         cfg["refiner_model"] = cfg["writer_model"]
+    tiers = cfg["routing"]["tiers"]
+    tiers["writer"] = tiers.get("writer") or cfg["writer_model"]
+    tiers["refiner"] = tiers.get("refiner") or cfg["refiner_model"]
     return cfg
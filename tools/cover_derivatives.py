@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# PIL and make_cover are imported inside the render functions so derivative_path
+# (used by `main.py export`) stays light.
+
+# name → cover_<name>.<ext>; override with cover.derivatives in the config
+DEFAULT_DERIVATIVES: list[dict] = [
+    {"name": "epub", "width": 1400, "format": "jpeg", "quality": 90},
+    {"name": "store", "width": 1000, "format": "jpeg", "quality": 88},
+    {"name": "thumb", "width": 400, "format": "jpeg", "quality": 85},
+    {"name": "thumb_webp", "width": 400, "format": "webp", "quality": 80},
+]
+EXTENSIONS = {"jpeg": "jpg", "jpg": "jpg", "webp": "webp", "png": "png"}
+
+def _specs(cfg: dict) -> list[dict]:
+    specs = (cfg.get("cover", {}) or {}).get("derivatives")
+    specs = list(DEFAULT_DERIVATIVES if specs is None else specs)
+    for spec in specs:
+        fmt = str(spec.get("format", "jpeg")).lower()
+        if fmt not in EXTENSIONS:
+            raise ValueError(f"cover derivative '{spec.get('name')}': unsupported format '{fmt}' "
+                             f"(expected one of {', '.join(sorted(EXTENSIONS))})")
+    return specs
+
+def derivative_path(cfg: dict, outdir: Path, name: str) -> Path | None:
+    """Path of an existing derivative by spec name (e.g. 'epub'), else None."""
+    for spec in _specs(cfg):
+        if spec.get("name") == name:
+            fmt = str(spec.get("format", "jpeg")).lower()
+            path = outdir / f"cover_{name}.{EXTENSIONS[fmt]}"
+            return path if path.exists() else None
+    return None
+
+def _save(im: Image.Image, path: Path, fmt: str, quality: int) -> None:
+    if fmt in ("jpeg", "jpg"):
+        im.convert("RGB").save(path, "JPEG", quality=quality, optimize=True, progressive=True)
+    elif fmt == "webp":
+        im.save(path, "WEBP", quality=quality, method=4)
+    elif fmt == "png":
+        im.save(path, "PNG", optimize=True)
+    else:
+        raise ValueError(f"unsupported cover format '{fmt}'")
+
+def derive_covers(master: Path, outdir: Path, specs: list[dict]) -> dict[str, Path]:
+    """
+    Derive every requested size from one master render.
+    Specs are processed largest-first and share a halving chain: each step uses
+    Image.reduce(2) (cheap box filter) until within 2x of the target, then one
+    LANCZOS resize for the final size. Returns {spec name: path}.
+    """
+    from PIL import Image, ImageOps
+    out: dict[str, Path] = {}
+    with Image.open(master) as src:
+        current = src.convert("RGB")
+    for spec in sorted(specs, key=lambda s: int(s["width"]), reverse=True):
+        w = int(spec["width"])
+        h = int(spec.get("height") or round(current.height * w / current.width))
+        while current.width >= 2 * w and current.height >= 2 * h:
+            current = current.reduce(2)
+        if spec.get("height"):
+            im = ImageOps.fit(current, (w, h), method=Image.Resampling.LANCZOS)
+        else:
+            im = current.resize((w, h), Image.Resampling.LANCZOS)
+        fmt = str(spec.get("format", "jpeg")).lower()
+        path = outdir / f"cover_{spec['name']}.{EXTENSIONS[fmt]}"
+        _save(im, path, fmt, int(spec.get("quality", 85)))
+        out[spec["name"]] = path
+    return out
+
+def render_covers(cfg: dict, outline: dict, outdir: Path, force: bool = True) -> dict[str, Path]:
+    """Render cover.png once (unless it exists and force is False) and derive all sizes from it."""
+    from .make_cover import make_cover
+    specs = _specs(cfg)  # validate before the expensive render
+    master = outdir / "cover.png"
+    if force or not master.exists():
+        make_cover(cfg, outline, master)
+    return derive_covers(master, outdir, specs)
+
+def _render_job(job: tuple[dict, dict, Path, bool]) -> dict[str, Path]:
+    return render_covers(*job)
+
+def _condense_titles(jobs: list[tuple[dict, dict, Path, bool]]) -> list[tuple[dict, dict, Path, bool]]:
+    """
+    Run the optional LLM title condense here, through this process's concurrency
+    controller, and hand the workers the finished title; each pool process would
+    otherwise have its own controller and the cap would not hold.
+    """
+    from .make_cover import cover_title
+    from .ollama_client import parallel_map
+
+    def _one(job: tuple[dict, dict, Path, bool]) -> tuple[dict, dict, Path, bool]:
+        cfg, outline, outdir, force = job
+        cover = cfg.get("cover", {}) or {}
+        renders = force or not (outdir / "cover.png").exists()
+        if not (renders and cover.get("condense_title", False)):
+            return job
+        return ({**cfg, "cover": {**cover, "condense_title": False}},
+                dict(outline, title=cover_title(cfg, outline)), outdir, force)
+    return parallel_map(_one, jobs)
+
+def batch_covers(jobs: list[tuple[dict, dict, Path, bool]], workers: int = 0) -> list[dict[str, Path]]:
+    """Render covers for many books in parallel processes (rendering is CPU-bound)."""
+    if len(jobs) <= 1 or workers == 1:
+        return [_render_job(j) for j in jobs]
+    jobs = _condense_titles(jobs)
+    with ProcessPoolExecutor(max_workers=workers or None) as ex:
+        return list(ex.map(_render_job, jobs))
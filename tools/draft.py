@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import re
 from pathlib import Path
-from .ollama_client import generate
+from .ollama_client import parallel_map
+from .routing import route_generate
+from .repetition import avoid_note
 
 CHAPTER_TPL = """
 Write a detailed chapter (~{words} words) for a {style} eBook.
@@ -21,28 +24,62 @@ Avoid:
 - Repetition, vague generalities, hallucinated stats
 """
 
+def _valid_chapter(cfg: dict, text: str) -> bool:
+    lo, hi = cfg.get("routing", {}).get("chapter_word_band", [0.6, 1.6])
+    words = len(text.split())
+    target = cfg["words_per_chapter"]
+    return lo * target <= words <= hi * target and "key takeaways" in text.lower()
+
+def _demote_headings(text: str) -> str:
+    """Turn the model's own '#'/'##' headings into '###' so only write_book's '## n.' lines mark chapters."""
+    out, in_code = [], False
+    for ln in text.strip().splitlines():
+        if ln.strip().startswith("```"):
+            in_code = not in_code
+        out.append(ln if in_code else re.sub(r"^#{1,2}(?=\s)", "###", ln))
+    return "\n".join(out)
+
+def draft_chapter(cfg: dict, ch: dict, i: int, avoid: str = "") -> str:
+    subs = ", ".join(ch.get("subsections", []))
+    prompt = CHAPTER_TPL.format(
+        words=cfg["words_per_chapter"],
+        style=cfg["style_preset"],
+        title=ch.get("title", f"Chapter {i}"),
+        subs=subs,
+        audience=cfg["audience"],
+        tone=cfg.get("tone", "practical, concise, human"),
+        persona=cfg.get("persona", "A knowledgeable but friendly coach."),
+        lang=cfg["language"],
+        region=(cfg.get("region") or "generic/global"),
+    )
+    text = route_generate(cfg, "chapter", prompt + avoid, options={"temperature": 0.85},
+                          validate=lambda out: _valid_chapter(cfg, out))
+    return _demote_headings(text)
+
 def write_book(cfg: dict, outline: dict, md_path: Path) -> None:
-    words = cfg["words_per_chapter"]
     chapters = outline.get("chapters", [])
     title = outline.get("title", cfg["topic"])
     subtitle = outline.get("subtitle", "")
 
+    # Chapters are independent, so draft them concurrently (bounded by the controller)
+    texts = parallel_map(lambda item: draft_chapter(cfg, item[1], item[0]),
+                         list(enumerate(chapters, start=1)))
+
     with md_path.open("w", encoding="utf-8") as f:
         f.write(f"# {title}\n\n")
         if subtitle:
             f.write(f"_{subtitle}_\n\n")
-        for i, ch in enumerate(chapters, start=1):
-            subs = ", ".join(ch.get("subsections", []))
-            prompt = CHAPTER_TPL.format(
-                words=words,
-                style=cfg["style_preset"],
-                title=ch.get("title", f"Chapter {i}"),
-                subs=subs,
-                audience=cfg["audience"],
-                tone=cfg.get("tone", "practical, concise, human"),
-                persona=cfg.get("persona", "A knowledgeable but friendly coach."),
-                lang=cfg["language"],
-                region=(cfg.get("region") or "generic/global"),
-            )
-            text = generate(cfg["writer_model"], prompt, options={"temperature": 0.85})
+        for i, (ch, text) in enumerate(zip(chapters, texts), start=1):
             f.write(f"\n\n## {i}. {ch.get('title', 'Untitled')}\n\n{text.strip()}\n")
+
+def redraft_chapter(cfg: dict, outline: dict):
+    """Regenerate callback for repetition.dedupe: redraft a flagged chapter from its outline entry."""
+    chapters = outline.get("chapters", [])
+
+    def _redraft(n: int, old: str, dups: list[dict]) -> str:
+        if not 1 <= n <= len(chapters):
+            return old
+        ch = chapters[n - 1]
+        text = draft_chapter(cfg, ch, n, avoid=avoid_note(dups))
+        return f"## {n}. {ch.get('title', 'Untitled')}\n\n{text.strip()}\n"
+    return _redraft
@@ -3,6 +3,8 @@ from __future__ import annotations
 import shutil, subprocess, re
 from pathlib import Path
 
+from .native_export import write_epub, write_html
+
 def has(cmd: str) -> bool:
     return shutil.which(cmd) is not None
 
@@ -42,7 +44,7 @@ def _sanitize_markdown_for_pandoc(src: Path, dest: Path) -> None:
 
     dest.write_text("\n".join(out_lines), encoding="utf-8")
 
-def export_all(cfg: dict, md_final: Path, cover: Path, outdir: Path) -> None:
+def export_all(cfg: dict, md_final: Path, cover: Path, outdir: Path, epub_cover: Path | None = None) -> None:
     css = Path("css/pandoc.css")
     title = cfg["topic"]
 
@@ -50,8 +52,12 @@ def export_all(cfg: dict, md_final: Path, cover: Path, outdir: Path) -> None:
     md_safe = outdir / "book_pandoc.md"
     _sanitize_markdown_for_pandoc(md_final, md_safe)
 
-    # EPUB
-    if cfg["export"].get("epub", True) and has("pandoc"):
+    # EPUB: in-process writer when asked for (or when pandoc is missing), else pandoc
+    epub_engine = cfg["export"].get("epub_engine", "auto")
+    use_native = epub_engine == "native" or (epub_engine == "auto" and not has("pandoc"))
+    if cfg["export"].get("epub", True) and use_native:
+        write_epub(cfg, md_safe, outdir / "book.epub", css, epub_cover or cover)
+    elif cfg["export"].get("epub", True) and has("pandoc"):
         run([
             "pandoc",
             str(md_safe),
@@ -59,12 +65,19 @@ def export_all(cfg: dict, md_final: Path, cover: Path, outdir: Path) -> None:
             "--toc",
             "--css", str(css),
             "--metadata", f"title={title}",
-            "--epub-cover-image", str(cover),
+            "--epub-cover-image", str(epub_cover or cover),
         ])
 
+    # Standalone HTML (in-process; CSS and cover inlined, so prefer the smaller derivative)
+    if cfg["export"].get("html", False):
+        write_html(cfg, md_safe, outdir / "book.html", css, epub_cover or cover)
+
     # DOCX
-    if cfg["export"].get("docx", True) and has("pandoc"):
-        run(["pandoc", str(md_safe), "-o", str(outdir / "book.docx"), "--toc"])
+    if cfg["export"].get("docx", True):
+        if has("pandoc"):
+            run(["pandoc", str(md_safe), "-o", str(outdir / "book.docx"), "--toc"])
+        else:
+            print("Pandoc not found → skipping DOCX.")
 
     # PDF
     if not cfg["export"].get("pdf", True):
@@ -86,10 +99,10 @@ def export_all(cfg: dict, md_final: Path, cover: Path, outdir: Path) -> None:
         return
 
     if engine == "chrome":
+        html_path = outdir / "book.html"
         if not has("pandoc"):
-            print("Pandoc not found → cannot produce HTML for chrome. Skipping PDF.")
+            write_html(cfg, md_safe, html_path, css, epub_cover or cover)
             return
-        html_path = outdir / "book.html"
         run([
             "pandoc",
             str(md_safe),
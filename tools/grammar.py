@@ -1,14 +1,27 @@
 from __future__ import annotations
 
+import threading
 from pathlib import Path
 
+# One LanguageTool (and its JVM) per language, kept warm across books
+_TOOLS: dict = {}
+_TOOLS_LOCK = threading.Lock()
+
+
+def _language_tool(lang: str):
+    import language_tool_python  # type: ignore
+    with _TOOLS_LOCK:
+        if lang not in _TOOLS:
+            _TOOLS[lang] = language_tool_python.LanguageTool(lang)
+        return _TOOLS[lang]
+
 
 def grammar_fix(cfg: dict, in_path: Path, out_path: Path) -> None:
     text = Path(in_path).read_text(encoding="utf-8")
     lang = cfg.get("language", "en-US")
     try:
         import language_tool_python  # type: ignore
-        tool = language_tool_python.LanguageTool(lang)
+        tool = _language_tool(lang)
         matches = tool.check(text)
         fixed = language_tool_python.utils.correct(text, matches)
     except Exception:
@@ -2,7 +2,9 @@ from __future__ import annotations
 
 import re, random
 from pathlib import Path
-from .ollama_client import generate
+from .ollama_client import parallel_map
+from .routing import route_generate
+from .repetition import avoid_note, chapter_number, split_chapters
 
 CONTRACTIONS = [
     (r"\bcan not\b", "cannot"),
@@ -68,45 +70,58 @@ def _split_sections(md: str, max_chars: int = 8000) -> list[str]:
         parts = [md]
     return parts
 
-def humanize(cfg: dict, in_path: Path, out_path: Path) -> None:
-    text_all = in_path.read_text(encoding='utf-8')
-    hcfg = cfg.get('humanize', {})
-    rate_q = float(hcfg.get('rhetorical_question_rate', 0.1))
-    add_check = bool(hcfg.get('add_checklists', True))
-    use_contr = bool(hcfg.get('contractions', True))
+def _valid_rewrite(cfg: dict, src: str, out: str) -> bool:
+    """Rewrite must keep roughly the same length and every '## ' heading."""
+    lo, hi = cfg.get('routing', {}).get('humanize_length_band', [0.75, 1.35])
+    ratio = len(out.split()) / max(1, len(src.split()))
+    heads = lambda t: len(re.findall(r"^## ", t, flags=re.MULTILINE))
+    return lo <= ratio <= hi and heads(out) >= heads(src)
 
+def rewrite_chunk(cfg: dict, chunk: str, avoid: str = "") -> str:
     persona = cfg.get('persona', 'a friendly coach')
     tone = cfg.get('tone', 'conversational, concise')
-
-    chunks = _split_sections(text_all, max_chars=8000)
-    rewritten: list[str] = []
-
-    for chunk in chunks:
-        prompt = f"""Rewrite the following markdown to be warmer, more conversational, and mentor-like.
+    prompt = f"""Rewrite the following markdown to be warmer, more conversational, and mentor-like.
 Use second person where natural, occasional first-person as a mentor.
 Keep headings and markdown structure intact. Keep facts intact.
 Maintain approximately the SAME length (±10%); DO NOT summarize or remove sections.
 Tone: {tone}
 Persona: {persona}
-Return only the revised markdown.
+{avoid}Return only the revised markdown.
 ---
 {chunk}
 """
-        try:
-            out = generate(cfg['refiner_model'], prompt, options={'temperature': 0.7, 'num_predict': 4096})
-        except Exception:
-            out = chunk
-        rewritten.append(out)
+    try:
+        return route_generate(cfg, 'humanize', prompt, options={'temperature': 0.7, 'num_predict': 4096},
+                              validate=lambda out: _valid_rewrite(cfg, chunk, out))
+    except Exception:
+        return chunk
 
-    revised = "\n\n".join(rewritten)
+def _post_process(cfg: dict, text: str) -> str:
+    """Deterministic touches applied after the LLM rewrite (whole book or a single chapter)."""
+    hcfg = cfg.get('humanize', {})
+    if bool(hcfg.get('contractions', True)):
+        text = _contractions(text)
+
+    paras = [p.strip() for p in text.split('\n\n') if p.strip()]
+    text = '\n\n'.join(_insert_rhetorical_q(paras, float(hcfg.get('rhetorical_question_rate', 0.1))))
 
-    if use_contr:
-        revised = _contractions(revised)
+    if bool(hcfg.get('add_checklists', True)):
+        text = _add_checklists(text)
+    return text
 
-    paras = [p.strip() for p in revised.split('\n\n') if p.strip()]
-    revised = '\n\n'.join(_insert_rhetorical_q(paras, rate_q))
+def humanize(cfg: dict, in_path: Path, out_path: Path) -> None:
+    text_all = in_path.read_text(encoding='utf-8')
+    chunks = _split_sections(text_all, max_chars=8000)
+    rewritten: list[str] = parallel_map(lambda c: rewrite_chunk(cfg, c), chunks)
+    out_path.write_text(_post_process(cfg, "\n\n".join(rewritten)), encoding='utf-8')
 
-    if add_check:
-        revised = _add_checklists(revised)
+def rehumanize_chapter(cfg: dict, src_path: Path):
+    """Regenerate callback for repetition.dedupe: rewrite a flagged chapter again from the humanize input."""
+    _, sources = split_chapters(src_path.read_text(encoding='utf-8'))
+    # Match by '## n.' number: the humanized book may have merged or dropped headings
+    by_number = {chapter_number(src): src for src in sources}
 
-    out_path.write_text(revised, encoding='utf-8')
+    def _rehumanize(n: int, old: str, dups: list[dict]) -> str:
+        src = by_number.get(n) or old
+        return _post_process(cfg, rewrite_chunk(cfg, src.strip(), avoid=avoid_note(dups)))
+    return _rehumanize
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import colorsys, hashlib
+from functools import lru_cache
 from pathlib import Path
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
 
 # -------------------- font helpers --------------------
-def _pick_font(paths: list[str], size: int):
+# Fonts are cached so repeated covers (and _auto_fit's size search) don't re-open files
+@lru_cache(maxsize=256)
+def _pick_font(paths: tuple[str, ...], size: int):
     for p in paths:
         try:
             return ImageFont.truetype(p, size)
@@ -13,6 +16,7 @@ def _pick_font(paths: list[str], size: int):
             continue
     return ImageFont.load_default()
 
+@lru_cache(maxsize=128)
 def _font_sans(size: int):
     mac = ["/System/Library/Fonts/Helvetica.ttc",
            "/System/Library/Fonts/Supplemental/Arial.ttf",
@@ -20,8 +24,9 @@ def _font_sans(size: int):
     win = ["C:/Windows/Fonts/arial.ttf", "C:/Windows/Fonts/segoeui.ttf"]
     lin = ["/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
            "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf"]
-    return _pick_font(mac + win + lin, size)
+    return _pick_font(tuple(mac + win + lin), size)
 
+@lru_cache(maxsize=128)
 def _font_script(size: int):
     # broad set to increase chances on mac/win/linux
     mac = ["/System/Library/Fonts/Supplemental/SnellRoundhand.ttc",
@@ -30,7 +35,7 @@ def _font_script(size: int):
            "/Library/Fonts/Apple Chancery.ttf"]
     win = ["C:/Windows/Fonts/brushs.ttf", "C:/Windows/Fonts/segoesc.ttf"]
     lin = ["/usr/share/fonts/truetype/dejavu/DejaVuSerif-Italic.ttf"]  # fallback
-    return _pick_font(mac + win + lin, size)
+    return _pick_font(tuple(mac + win + lin), size)
 
 # -------------------- color + layout helpers --------------------
 def _hsl(h: float, s: float, l: float) -> tuple[int, int, int]:
@@ -140,10 +145,11 @@ def _condense_title(title: str, cfg: dict) -> str:
     max_words = int(cover_cfg.get("max_title_words", 6))
     # Try LLM condense if available
     try:
-        from .ollama_client import generate
-        res = generate(cfg.get("refiner_model", cfg.get("writer_model")),
-                       f"Condense the title to maximum {max_words} words. Keep meaning. Return only the title: {title}",
-                       options={"temperature":0.3}).strip().strip('"')
+        from .routing import route_generate
+        fits = lambda t: 1 <= len(t.strip().strip('"').split()) <= max_words and "\n" not in t.strip()
+        res = route_generate(cfg, "title",
+                             f"Condense the title to maximum {max_words} words. Keep meaning. Return only the title: {title}",
+                             options={"temperature":0.3}, validate=fits).strip().strip('"')
         if 1 <= len(res.split()) <= max_words:
             return res
     except Exception:
@@ -152,6 +158,11 @@ def _condense_title(title: str, cfg: dict) -> str:
     words = [w for w in title.split() if len(w) > 2]
     return " ".join(words[:max_words]) or title
 
+def cover_title(cfg: dict, outline: dict) -> str:
+    """The title as drawn on the cover (condensed by the LLM when cover.condense_title is on)."""
+    title = (outline.get("title") or cfg.get("topic") or "Untitled").strip()
+    return _condense_title(title, cfg)
+
 # -------------------- main --------------------
 def make_cover(cfg: dict, outline: dict, out_path: Path) -> None:
     size = cfg.get("cover_size", [1600, 2560])
@@ -161,11 +172,10 @@ def make_cover(cfg: dict, outline: dict, out_path: Path) -> None:
         W, H = 1600, 2560
 
     # palette
-    title = (outline.get("title") or cfg.get("topic") or "Untitled").strip()
     subtitle = (outline.get("subtitle") or cfg.get("subtitle") or "").strip()
     cover_cfg = (cfg.get("cover", {}) or {})
     show_sub = bool(cover_cfg.get("show_subtitle", False))  # default OFF
-    title = _condense_title(title, cfg)
+    title = cover_title(cfg, outline)
 
     hue = _hash_hue(title)
     top, bottom = _hsl(hue, 0.52, 0.58), _hsl((hue+28)%360, 0.50, 0.42)
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import base64, datetime, html, re, uuid, zipfile
+from html.parser import HTMLParser
+from pathlib import Path
+from xml.etree import ElementTree
+
+import markdown
+
+MD_EXTENSIONS = ["extra", "sane_lists", "toc"]
+MD_CONFIG = {"toc": {"toc_depth": "1-3"}}
+HEADING_RE = re.compile(r"^#{1,2}\s")
+NAME_RE = re.compile(r"^[A-Za-z_][\w.-]*$")
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+MEDIA_TYPES = {".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".webp": "image/webp"}
+
+# -------------------- markdown helpers --------------------
+def _render(md_text: str) -> tuple[str, list[dict]]:
+    """Render markdown to XHTML; also return the heading tree from the toc extension."""
+    md = markdown.Markdown(extensions=MD_EXTENSIONS, extension_configs=MD_CONFIG, output_format="xhtml")
+    body = md.convert(md_text)
+    return _to_xhtml(body), md.toc_tokens
+
+class _XHTMLWriter(HTMLParser):
+    """
+    Re-serialise an HTML fragment as well-formed XHTML. Markdown passes raw HTML
+    from the model through untouched (<br>, unclosed <p>, &nbsp;, o:p tags), which
+    is fine for browsers but breaks EPUB's XML. Void elements are self-closed,
+    unclosed tags closed, stray end tags and namespaced tags/attributes dropped,
+    and text/attributes re-escaped (entities are decoded by the parser first).
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.out: list[str] = []
+        self.stack: list[str] = []
+
+    def _open(self, tag: str, attrs: list, close: bool) -> None:
+        if not NAME_RE.match(tag):
+            return
+        seen, parts = set(), []
+        for k, v in attrs:
+            if NAME_RE.match(k) and k not in seen:
+                seen.add(k)
+                parts.append(f' {k}="{html.escape(v if v is not None else k, quote=True)}"')
+        if close or tag in VOID_TAGS:
+            self.out.append(f"<{tag}{''.join(parts)}/>")
+        else:
+            self.out.append(f"<{tag}{''.join(parts)}>")
+            self.stack.append(tag)
+
+    def handle_starttag(self, tag, attrs):
+        self._open(tag, attrs, close=False)
+
+    def handle_startendtag(self, tag, attrs):
+        self._open(tag, attrs, close=True)
+
+    def handle_endtag(self, tag):
+        if tag not in self.stack:
+            return
+        while self.stack:
+            t = self.stack.pop()
+            self.out.append(f"</{t}>")
+            if t == tag:
+                break
+
+    def handle_data(self, data):
+        self.out.append(html.escape(data, quote=False))
+
+    def close(self) -> None:
+        super().close()
+        while self.stack:
+            self.out.append(f"</{self.stack.pop()}>")
+
+def _to_xhtml(fragment: str) -> str:
+    w = _XHTMLWriter()
+    w.feed(fragment)
+    w.close()
+    return "".join(w.out)
+
+def _split_sections(md_text: str) -> list[str]:
+    """Split at '#'/'##' headings outside code fences; text before the first heading stays with it."""
+    sections, buf, in_code = [], [], False
+    for ln in md_text.splitlines():
+        if ln.strip().startswith("```"):
+            in_code = not in_code
+        if not in_code and HEADING_RE.match(ln) and any(b.strip() for b in buf):
+            sections.append("\n".join(buf))
+            buf = []
+        buf.append(ln)
+    if any(b.strip() for b in buf):
+        sections.append("\n".join(buf))
+    return sections
+
+def _toc_items(tokens: list[dict], href: str = "", depth: int = 2) -> str:
+    items = []
+    for t in tokens:
+        sub = _toc_items(t.get("children", []), href, depth - 1) if depth > 1 else ""
+        label = html.escape(html.unescape(t["name"]))
+        items.append(f'<li><a href="{href}#{t["id"]}">{label}</a>{f"<ol>{sub}</ol>" if sub else ""}</li>')
+    return "".join(items)
+
+def _media_type(path: Path) -> str:
+    return MEDIA_TYPES.get(path.suffix.lower(), "image/png")
+
+# -------------------- standalone HTML --------------------
+def write_html(cfg: dict, md_path: Path, out_path: Path, css: Path, cover: Path | None = None) -> None:
+    """Single self-contained HTML file: CSS inlined, cover embedded as a data URI, TOC up front."""
+    title = html.escape(cfg["topic"])
+    body, toc = _render(md_path.read_text(encoding="utf-8"))
+    style = css.read_text(encoding="utf-8") if css.exists() else ""
+    cover_html = ""
+    if cover and cover.exists():
+        data = base64.b64encode(cover.read_bytes()).decode("ascii")
+        cover_html = f'<div class="cover"><img src="data:{_media_type(cover)};base64,{data}" alt="Cover"/></div>\n'
+    toc_html = f'<nav id="TOC"><ol>{_toc_items(toc, depth=3)}</ol></nav>\n' if toc else ""
+    out_path.write_text(
+        f"""<!DOCTYPE html>
+<html lang="{cfg.get('language', 'en-US')}">
+<head>
+<meta charset="utf-8"/>
+<title>{title}</title>
+<style>
+{style}
+</style>
+</head>
+<body>
+{cover_html}{toc_html}{body}
+</body>
+</html>
+""", encoding="utf-8")
+
+# -------------------- EPUB3 --------------------
+CONTAINER_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="EPUB/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+"""
+
+def _xhtml(title: str, lang: str, body: str, extra_ns: str = "", css_href: str = "../css/pandoc.css") -> str:
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml"{extra_ns} xml:lang="{lang}" lang="{lang}">
+<head>
+<meta charset="utf-8"/>
+<title>{title}</title>
+<link rel="stylesheet" type="text/css" href="{css_href}"/>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+def write_epub(cfg: dict, md_path: Path, out_path: Path, css: Path, cover: Path | None = None) -> None:
+    """EPUB3 written directly with zipfile: one XHTML file per chapter, nav TOC, CSS and cover image."""
+    title = html.escape(cfg["topic"])
+    lang = cfg.get("language", "en-US")
+    book_id = uuid.uuid5(uuid.NAMESPACE_URL, f"ebook:{cfg['topic']}")
+    modified = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    chapters = []  # (file name, xhtml, toc tokens)
+    for i, section in enumerate(_split_sections(md_path.read_text(encoding="utf-8")), start=1):
+        body, toc = _render(section)
+        name, doc = f"ch{i:03d}.xhtml", _xhtml(title, lang, body)
+        try:
+            ElementTree.fromstring(doc.encode("utf-8"))
+        except ElementTree.ParseError as e:
+            raise ValueError(f"EPUB chapter {name} is not well-formed XML: {e}") from e
+        chapters.append((name, doc, toc))
+
+    manifest = ['<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>',
+                '<item id="css" href="css/pandoc.css" media-type="text/css"/>']
+    spine = []
+    has_cover = bool(cover and cover.exists())
+    if has_cover:
+        cover_name = f"cover{cover.suffix.lower()}"
+        manifest += [f'<item id="cover-image" href="media/{cover_name}" media-type="{_media_type(cover)}" properties="cover-image"/>',
+                     '<item id="cover" href="text/cover.xhtml" media-type="application/xhtml+xml"/>']
+        spine.append('<itemref idref="cover" linear="no"/>')
+    for name, _, _ in chapters:
+        item_id = name.rsplit(".", 1)[0]
+        manifest.append(f'<item id="{item_id}" href="text/{name}" media-type="application/xhtml+xml"/>')
+        spine.append(f'<itemref idref="{item_id}"/>')
+
+    manifest_xml, spine_xml = "\n    ".join(manifest), "\n    ".join(spine)
+    cover_meta = '\n    <meta name="cover" content="cover-image"/>' if has_cover else ""
+    opf = f"""<?xml version="1.0" encoding="UTF-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="book-id" xml:lang="{lang}">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+    <dc:identifier id="book-id">urn:uuid:{book_id}</dc:identifier>
+    <dc:title>{title}</dc:title>
+    <dc:language>{lang}</dc:language>
+    <meta property="dcterms:modified">{modified}</meta>{cover_meta}
+  </metadata>
+  <manifest>
+    {manifest_xml}
+  </manifest>
+  <spine>
+    {spine_xml}
+  </spine>
+</package>
+"""
+
+    toc_items = "".join(_toc_items(toc, href=f"text/{name}") for name, _, toc in chapters)
+    nav_body = f'<nav epub:type="toc" id="toc"><h1>Contents</h1><ol>{toc_items}</ol></nav>'
+    nav = _xhtml(title, lang, nav_body, ' xmlns:epub="http://www.idpf.org/2007/ops"', css_href="css/pandoc.css")
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(out_path, "w") as z:
+        # The mimetype entry must come first and be stored uncompressed
+        z.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+        z.writestr("META-INF/container.xml", CONTAINER_XML, compress_type=zipfile.ZIP_DEFLATED)
+        z.writestr("EPUB/content.opf", opf, compress_type=zipfile.ZIP_DEFLATED)
+        z.writestr("EPUB/nav.xhtml", nav, compress_type=zipfile.ZIP_DEFLATED)
+        z.writestr("EPUB/css/pandoc.css", css.read_text(encoding="utf-8") if css.exists() else "",
+                   compress_type=zipfile.ZIP_DEFLATED)
+        if has_cover:
+            z.write(cover, f"EPUB/media/{cover_name}", compress_type=zipfile.ZIP_STORED)
+            cover_body = f'<div class="cover"><img src="../media/{cover_name}" alt="Cover"/></div>'
+            z.writestr("EPUB/text/cover.xhtml", _xhtml(title, lang, cover_body), compress_type=zipfile.ZIP_DEFLATED)
+        for name, xhtml, _ in chapters:
+            z.writestr(f"EPUB/text/{name}", xhtml, compress_type=zipfile.ZIP_DEFLATED)
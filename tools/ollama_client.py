@@ -1,10 +1,192 @@
 from __future__ import annotations
-import os, requests
+import os, threading, time, requests
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterable, TypeVar
 
 BASE = os.environ.get("OLLAMA_BASE_URL", "http://127.0.0.1:11434")
 
+T = TypeVar("T")
+R = TypeVar("R")
+
+# -------------------- adaptive concurrency (AIMD) --------------------
+class ConcurrencyController:
+    """
+    Caps in-flight Ollama requests and tunes the cap with AIMD, one decision per
+    window of completed requests:
+    - additive increase (+1) after every window without a congestion signal, so
+      the controller keeps probing for spare capacity;
+    - multiplicative decrease on congestion: the extra slot bought less than
+      `tolerance` of the ideal (linear) throughput gain, throughput fell more
+      than `tolerance` below the best window at an unchanged limit, mean latency
+      exceeded `latency_target`, or a request failed.
+    Aggregate throughput of a window is the generated tokens (eval_count) of its
+    completions divided by the busy wall-clock time it spanned, so time a request
+    spent queued inside Ollama counts against it. A window discards completions
+    that started under the previous limit and then collects max(4, 2*limit)
+    samples, so each decision reflects the current limit only.
+    """
+
+    def __init__(self, initial: int = 1, min_limit: int = 1, max_limit: int = 4,
+                 backoff: float = 0.7, tolerance: float = 0.10,
+                 latency_target: float = 0.0, smoothing: float = 0.3) -> None:
+        self._cond = threading.Condition()
+        self.configure(initial=initial, min_limit=min_limit, max_limit=max_limit,
+                       backoff=backoff, tolerance=tolerance,
+                       latency_target=latency_target, smoothing=smoothing)
+
+    def configure(self, initial: int = 1, min_limit: int = 1, max_limit: int = 4,
+                  backoff: float = 0.7, tolerance: float = 0.10,
+                  latency_target: float = 0.0, smoothing: float = 0.3) -> None:
+        with self._cond:
+            self.min_limit = max(1, int(min_limit))
+            self.max_limit = max(self.min_limit, int(max_limit))
+            self.limit = float(min(self.max_limit, max(self.min_limit, int(initial))))
+            self.backoff = float(backoff)
+            self.tolerance = float(tolerance)
+            self.latency_target = float(latency_target)  # seconds; 0 disables
+            self.smoothing = float(smoothing)  # EWMA for the reported stats only
+            self.in_flight = 0
+            self.completed = 0
+            self.failures = 0
+            self._busy = 0.0        # seconds with at least one request in flight
+            self._busy_since = 0.0
+            self._reset_measurements()
+            self._cond.notify_all()
+
+    def _reset_measurements(self) -> None:
+        self.throughput = 0.0
+        self.latency = 0.0
+        self._prev_mean = 0.0   # aggregate tokens/sec of the last window
+        self._prev_level = 0    # int(limit) during that window
+        self._peak = 0.0        # best window mean since the limit last changed
+        self._start_window()
+
+    def _start_window(self) -> None:
+        # completions already in flight were admitted under the old limit
+        self._skip = self.in_flight
+        self._tokens = 0
+        self._lat: list[float] = []
+        self._t0 = self._busy_time()
+
+    def _busy_time(self) -> float:
+        # idle gaps between pipeline stages must not dilute the window's throughput
+        if self.in_flight:
+            return self._busy + time.monotonic() - self._busy_since
+        return self._busy
+
+    @contextmanager
+    def slot(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            if not self.in_flight:
+                self._busy_since = time.monotonic()
+            self.in_flight += 1
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                if not self.in_flight:
+                    self._busy += time.monotonic() - self._busy_since
+                if not ok:
+                    self._decrease()
+                    self.failures += 1
+                self._cond.notify_all()
+
+    def record(self, tokens: int, latency: float) -> None:
+        """Feed one completed request's generated token count and wall latency back into the controller."""
+        with self._cond:
+            self.completed += 1
+            if tokens <= 0:
+                return
+            a = self.smoothing
+            self.latency = latency if not self.latency else (1 - a) * self.latency + a * latency
+            if self._skip > 0:
+                self._skip -= 1
+                if not self._skip:
+                    self._t0 = self._busy_time()  # the window's clock starts once the old limit has drained
+                return
+            self._tokens += tokens
+            self._lat.append(latency)
+            level = int(self.limit)
+            if len(self._lat) < max(4, 2 * level):
+                return
+
+            elapsed = self._busy_time() - self._t0
+            mean = self._tokens / elapsed if elapsed > 0 else 0.0
+            self.throughput = mean if not self.throughput else (1 - a) * self.throughput + a * mean
+            mean_latency = sum(self._lat) / len(self._lat)
+            if self.latency_target > 0 and mean_latency > self.latency_target:
+                congested = True
+            elif not self._prev_mean:
+                congested = False
+            elif level > self._prev_level:
+                ideal_gain = (level - self._prev_level) / self._prev_level
+                congested = mean < self._prev_mean * (1 + self.tolerance * ideal_gain)
+            else:
+                congested = mean < self._peak * (1 - self.tolerance)
+
+            if congested:
+                self._decrease()
+            else:
+                self._peak = max(self._peak, mean) if level == self._prev_level else mean
+                self._prev_mean, self._prev_level = mean, level
+                self.limit = min(float(self.max_limit), self.limit + 1)
+                self._start_window()
+            self._skip = max(0, self._skip - 1)  # this request was counted in flight but is already recorded
+            self._cond.notify_all()
+
+    def _decrease(self) -> None:
+        # from the whole level, so fractional leftovers can't drift the limit back up
+        self.limit = max(float(self.min_limit), int(self.limit) * self.backoff)
+        self._reset_measurements()
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "throughput_tps": round(self.throughput, 1),
+                "latency_s": round(self.latency, 2),
+                "completed": self.completed,
+                "failures": self.failures,
+            }
+
+CONTROLLER = ConcurrencyController()
+
+def configure_concurrency(cfg: dict) -> None:
+    c = cfg.get("concurrency", {}) or {}
+    CONTROLLER.configure(
+        initial=c.get("initial", 1),
+        min_limit=c.get("min", 1),
+        max_limit=c.get("max", 4),
+        backoff=c.get("backoff", 0.7),
+        tolerance=c.get("tolerance", 0.10),
+        latency_target=c.get("latency_target", 0),
+    )
+
+def parallel_map(fn: Callable[[T], R], items: Iterable[T]) -> list[R]:
+    """Run fn over items in order; the controller decides how many LLM calls actually overlap."""
+    items = list(items)
+    if len(items) <= 1 or CONTROLLER.max_limit <= 1:
+        return [fn(x) for x in items]
+    with ThreadPoolExecutor(max_workers=min(len(items), CONTROLLER.max_limit)) as ex:
+        return list(ex.map(fn, items))
+
+def _eval_tokens(data: dict) -> int:
+    # eval_duration leaves out time spent queued on the server, so only the count is used
+    return int(data.get("eval_count") or 0)
+
+# -------------------- HTTP --------------------
+# Shared session keeps connections to Ollama alive between calls
+_SESSION = requests.Session()
+
 def _post(path: str, payload: dict) -> requests.Response:
-    return requests.post(f"{BASE}{path}", json=payload, timeout=600)
+    return _SESSION.post(f"{BASE}{path}", json=payload, timeout=600)
 
 def generate(model: str, prompt: str, options: dict | None = None) -> str:
     # Ensure we allow long outputs unless the caller overrides it
@@ -19,20 +201,24 @@ def generate(model: str, prompt: str, options: dict | None = None) -> str:
         "stream": False,
         "options": opts,
     }
-    r = _post("/api/chat", payload_chat)
+    with CONTROLLER.slot():
+        t0 = time.monotonic()
+        r = _post("/api/chat", payload_chat)
 
-    if r.status_code == 404:
-        # Fallback to legacy /api/generate
-        payload_gen = {"model": model, "prompt": prompt, "stream": False, "options": opts}
-        r = _post("/api/generate", payload_gen)
+        if r.status_code == 404:
+            # Fallback to legacy /api/generate
+            payload_gen = {"model": model, "prompt": prompt, "stream": False, "options": opts}
+            r = _post("/api/generate", payload_gen)
 
-    if not r.ok:
-        try:
-            body = r.json()
-        except Exception:
-            body = r.text
-        raise RuntimeError(f"Ollama error {r.status_code}: {body}")
+        if not r.ok:
+            try:
+                body = r.json()
+            except Exception:
+                body = r.text
+            raise RuntimeError(f"Ollama error {r.status_code}: {body}")
+
+        data = r.json()
+        CONTROLLER.record(_eval_tokens(data), time.monotonic() - t0)
 
-    data = r.json()
     # chat returns {"message":{"content":...}}, generate returns {"response":...}
     return (data.get("message", {}) or {}).get("content") or data.get("response", "")
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from .ollama_client import generate
+from .routing import route_generate
 from .util import extract_json
 
 TPL = """
@@ -22,6 +22,15 @@ Constraints:
 Return ONLY JSON.
 """
 
+def _valid_outline(cfg: dict, raw: str) -> bool:
+    try:
+        data = extract_json(raw)
+    except ValueError:
+        return False
+    chapters = data.get("chapters")
+    return (bool(data.get("title")) and isinstance(chapters, list) and len(chapters) >= cfg["chapters"]
+            and all(isinstance(ch, dict) and ch.get("title") for ch in chapters))
+
 def build_outline(cfg: dict) -> dict:
     prompt = TPL.format(
         topic=cfg["topic"],
@@ -35,7 +44,8 @@ def build_outline(cfg: dict) -> dict:
         lang=cfg["language"],
         region=cfg.get("region") or "generic/global",
     )
-    raw = generate(cfg["writer_model"], prompt, options={"temperature": 0.7})
+    raw = route_generate(cfg, "outline", prompt, options={"temperature": 0.7},
+                         validate=lambda out: _valid_outline(cfg, out))
     data = extract_json(raw)
     data["chapters"] = data.get("chapters", [])[: cfg["chapters"]]
     return data
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json, threading
+from pathlib import Path
+from typing import Callable
+
+from .outline import build_outline
+from .draft import write_book, redraft_chapter
+from .style_pass import style_variation
+from .humanize import humanize, rehumanize_chapter
+from .repetition import dedupe
+from .grammar import grammar_fix
+from .cover_derivatives import render_covers
+from .export import export_all
+from .quality import report as quality_report
+from . import routing
+
+# (key, label) in run order; used for progress reporting
+STAGES = [
+    ("outline", "Generating outline"),
+    ("draft", "Drafting chapters"),
+    ("style", "Style pass"),
+    ("humanize", "Humanize"),
+    ("grammar", "Grammar pass"),
+    ("cover", "Cover"),
+    ("quality", "Quality report"),
+    ("export", "Exporting"),
+]
+
+class JobCancelled(Exception):
+    pass
+
+def build_book(cfg: dict, outdir: Path,
+               on_stage: Callable[[str, str, str], None] | None = None,
+               on_note: Callable[[str], None] | None = None,
+               cancel: threading.Event | None = None) -> Path:
+    """
+    Run the full pipeline into outdir and return the final markdown path.
+    on_stage(key, label, target) fires before each stage; cancellation is
+    checked between stages (an in-progress stage runs to completion).
+    """
+    labels = dict(STAGES)
+    routing_before = routing.stats()
+
+    def stage(key: str, target: Path | str = "") -> None:
+        if cancel is not None and cancel.is_set():
+            raise JobCancelled(key)
+        if on_stage:
+            on_stage(key, labels[key], str(target))
+
+    def note(text: str) -> None:
+        if on_note:
+            on_note(text)
+
+    outdir.mkdir(parents=True, exist_ok=True)
+    outline_path = outdir / "outline.json"
+    md_path = outdir / "book.md"
+    refined_path = outdir / "book_refined.md"
+    human_path = outdir / "book_human.md"
+    final_path = outdir / "book_final.md"
+    cover_path = outdir / "cover.png"
+    quality_path = outdir / "quality.json"
+    dedupe_on = bool(cfg.get("repetition", {}).get("enabled", True))
+
+    stage("outline", outline_path)
+    outline = build_outline(cfg)
+    outline_path.write_text(json.dumps(outline, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    stage("draft", md_path)
+    write_book(cfg, outline, md_path)
+    if dedupe_on:
+        redone = dedupe(cfg, md_path, redraft_chapter(cfg, outline), outdir / "repetition_draft.json")
+        if redone:
+            note(f"↻ redrafted repetitive chapters: {redone}")
+
+    stage("style", refined_path)
+    style_variation(md_path, refined_path)
+
+    if cfg.get("humanize", {}).get("enabled", False):
+        stage("humanize", human_path)
+        humanize(cfg, refined_path, human_path)
+        if dedupe_on:
+            redone = dedupe(cfg, human_path, rehumanize_chapter(cfg, refined_path), outdir / "repetition_human.json")
+            if redone:
+                note(f"↻ re-humanized repetitive chapters: {redone}")
+        source_for_grammar = human_path
+    else:
+        source_for_grammar = refined_path
+
+    stage("grammar", final_path)
+    grammar_fix(cfg, source_for_grammar, final_path)
+
+    stage("cover", cover_path)
+    derived = render_covers(cfg, outline, outdir)
+
+    stage("quality", quality_path)
+    quality_report(final_path, quality_path)
+
+    stage("export", outdir)
+    export_all(cfg, final_path, cover_path, outdir, epub_cover=derived.get("epub"))
+
+    # Per-tier hit rates of the model cascade for this book only
+    (outdir / "routing.json").write_text(json.dumps(routing.stats_since(routing_before), indent=2), encoding="utf-8")
+    return final_path
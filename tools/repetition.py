@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import json, random, re, zlib
+from pathlib import Path
+from typing import Callable
+
+# Chapters are written by draft.write_book as "## <n>. <title>"
+CHAPTER_RE = re.compile(r"^## (\d+)\.\s", re.MULTILINE)
+WORD_RE = re.compile(r"[a-z0-9']+")
+_PRIME = (1 << 61) - 1
+
+# -------------------- chapter helpers --------------------
+def split_chapters(md: str) -> tuple[str, list[str]]:
+    """
+    Return (front matter, [chapter text, ...]); each chapter starts at its '## n.'
+    heading. Only headings numbered above the previous chapter count, so a
+    numbered '## 1. ...' subheading inside a chapter stays part of it.
+    """
+    starts, last = [], 0
+    for m in CHAPTER_RE.finditer(md):
+        if int(m.group(1)) > last:
+            starts.append(m.start())
+            last = int(m.group(1))
+    if not starts:
+        return md, []
+    bounds = starts + [len(md)]
+    return md[:starts[0]], [md[a:b] for a, b in zip(bounds, bounds[1:])]
+
+def chapter_number(chapter: str) -> int | None:
+    """The n of a chapter's leading '## n.' heading, if any."""
+    m = CHAPTER_RE.match(chapter.lstrip())
+    return int(m.group(1)) if m else None
+
+def _paragraphs(chapter: str, min_words: int) -> list[str]:
+    out = []
+    for p in re.split(r"\n\s*\n", chapter):
+        p = p.strip()
+        if p and not p.startswith("#") and len(p.split()) >= min_words:
+            out.append(p)
+    return out
+
+# -------------------- MinHash / LSH --------------------
+def _shingles(text: str, k: int) -> set[int]:
+    words = WORD_RE.findall(text.lower())
+    if len(words) < k:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {zlib.crc32(" ".join(words[i:i + k]).encode("utf-8")) for i in range(len(words) - k + 1)}
+
+def _permutations(num_perm: int, seed: int = 1) -> list[tuple[int, int]]:
+    rnd = random.Random(seed)
+    return [(rnd.randrange(1, _PRIME), rnd.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+def _signature(shingles: set[int], perms: list[tuple[int, int]]) -> tuple[int, ...]:
+    return tuple(min((a * x + b) % _PRIME for x in shingles) for a, b in perms)
+
+def find_repetition(chapters: list[str], shingle_size: int = 5, num_perm: int = 96,
+                    bands: int = 32, threshold: float = 0.5, min_words: int = 25) -> list[dict]:
+    """
+    Flag near-duplicate paragraphs within and across chapters.
+    LSH buckets propose candidate pairs; each is confirmed with exact Jaccard
+    similarity on the shingle sets. The later occurrence is the one reported;
+    chapters are reported by their '## n.' number (position if unnumbered).
+    """
+    perms = _permutations(num_perm)
+    rows = max(1, num_perm // max(1, bands))
+
+    spans: list[tuple[int, int, str, set[int]]] = []
+    for ci, ch in enumerate(chapters, start=1):
+        ci = chapter_number(ch) or ci
+        for pi, para in enumerate(_paragraphs(ch, min_words)):
+            sh = _shingles(para, shingle_size)
+            if sh:
+                spans.append((ci, pi, para, sh))
+
+    buckets: dict[tuple, list[int]] = {}
+    for idx, (_, _, _, sh) in enumerate(spans):
+        sig = _signature(sh, perms)
+        for b in range(0, rows * bands, rows):
+            buckets.setdefault((b, sig[b:b + rows]), []).append(idx)
+
+    candidates: set[tuple[int, int]] = set()
+    for ids in buckets.values():
+        for i in range(len(ids)):
+            for j in range(i + 1, len(ids)):
+                candidates.add((ids[i], ids[j]))
+
+    dups = []
+    for i, j in sorted(candidates):
+        (ca, pa, _, sa), (cb, pb, text_b, sb) = spans[i], spans[j]
+        sim = len(sa & sb) / len(sa | sb)
+        if sim >= threshold:
+            dups.append({
+                "chapter": cb, "paragraph": pb + 1,
+                "duplicates_chapter": ca, "duplicates_paragraph": pa + 1,
+                "similarity": round(sim, 3),
+                "excerpt": text_b[:160],
+            })
+    return dups
+
+def flagged_chapters(dups: list[dict]) -> list[int]:
+    """Numbers of the chapters that should be regenerated."""
+    return sorted({d["chapter"] for d in dups})
+
+# -------------------- detect + regenerate --------------------
+def index_params(cfg: dict) -> dict:
+    """find_repetition keyword arguments from the 'repetition' config block."""
+    rcfg = cfg.get("repetition", {}) or {}
+    return dict(
+        shingle_size=int(rcfg.get("shingle_size", 5)),
+        num_perm=int(rcfg.get("num_perm", 96)),
+        bands=int(rcfg.get("bands", 32)),
+        threshold=float(rcfg.get("threshold", 0.5)),
+        min_words=int(rcfg.get("min_words", 25)),
+    )
+
+def dedupe(cfg: dict, md_path: Path, regenerate: Callable[[int, str, list[dict]], str],
+           report_path: Path | None = None) -> list[int]:
+    """
+    Index md_path, regenerate only the flagged chapters via
+    `regenerate(number, chapter_text, dups) -> new chapter text`, and re-check.
+    Returns the chapter numbers that were regenerated.
+    """
+    from .ollama_client import parallel_map  # keeps the report-only CLI path free of requests
+    params = index_params(cfg)
+    max_rounds = int((cfg.get("repetition", {}) or {}).get("max_rounds", 1))
+
+    rounds, regenerated = [], set()
+    for rnd in range(max_rounds + 1):
+        md = md_path.read_text(encoding="utf-8")
+        head, chapters = split_chapters(md)
+        dups = find_repetition(chapters, **params)
+        flagged = flagged_chapters(dups)
+        rounds.append({"round": rnd, "flagged": flagged, "duplicates": dups})
+        if not flagged or rnd == max_rounds:
+            break
+        index = {chapter_number(ch) or i: i - 1 for i, ch in enumerate(chapters, start=1)}
+
+        def _regen(n: int) -> str:
+            old = chapters[index[n]]
+            new = regenerate(n, old, [d for d in dups if d["chapter"] == n]).rstrip()
+            return new + old[len(old.rstrip()):]  # keep the original spacing before the next chapter
+
+        for n, text in zip(flagged, parallel_map(_regen, flagged)):
+            chapters[index[n]] = text
+            regenerated.add(n)
+        md_path.write_text(head + "".join(chapters), encoding="utf-8")
+
+    if report_path is not None:
+        report_path.write_text(json.dumps({"source": md_path.name, "rounds": rounds}, indent=2), encoding="utf-8")
+    return sorted(regenerated)
+
+def avoid_note(dups: list[dict]) -> str:
+    """Prompt addendum listing the passages a regenerated chapter must not repeat."""
+    lines = [f"- {d['excerpt']}…" for d in dups[:5]]
+    return ("These passages already appear elsewhere in the book; do NOT repeat or paraphrase them:\n"
+            + "\n".join(lines) + "\n")
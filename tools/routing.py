@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable
+
+from .ollama_client import generate
+
+# Hit-rate counters per task and tier, cumulative for the process
+_STATS: dict[str, dict[str, dict[str, int]]] = {}
+_LOCK = threading.Lock()
+
+def _record(task: str, tier: str, outcome: str) -> None:
+    with _LOCK:
+        t = _STATS.setdefault(task, {}).setdefault(tier, {"calls": 0, "accepted": 0, "rejected": 0, "errors": 0})
+        t["calls"] += 1
+        t[outcome] += 1
+
+def stats() -> dict:
+    """{task: {tier: {calls, accepted, rejected, errors, hit_rate}}}"""
+    with _LOCK:
+        return {
+            task: {tier: dict(c, hit_rate=round(c["accepted"] / c["calls"], 3) if c["calls"] else 0.0)
+                   for tier, c in tiers.items()}
+            for task, tiers in _STATS.items()
+        }
+
+def stats_since(before: dict) -> dict:
+    """stats() minus an earlier stats() snapshot, i.e. the calls made in between."""
+    out = {}
+    for task, tiers in stats().items():
+        for tier, c in tiers.items():
+            prev = before.get(task, {}).get(tier, {})
+            d = {k: c[k] - prev.get(k, 0) for k in ("calls", "accepted", "rejected", "errors")}
+            if d["calls"]:
+                d["hit_rate"] = round(d["accepted"] / d["calls"], 3)
+                out.setdefault(task, {})[tier] = d
+    return out
+
+def models_for(cfg: dict, task: str) -> list[tuple[str, str]]:
+    """Cascade of (tier, model) for a task, cheapest first; unset tiers and repeated models are skipped."""
+    rcfg = cfg.get("routing", {}) or {}
+    tiers = rcfg.get("tiers", {}) or {}
+    chain: list[tuple[str, str]] = []
+    for tier in (rcfg.get("tasks", {}) or {}).get(task, ["writer"]):
+        model = tiers.get(tier) or ""
+        if model and model not in (m for _, m in chain):
+            chain.append((tier, model))
+    return chain or [("writer", cfg["writer_model"])]
+
+def route_generate(cfg: dict, task: str, prompt: str, options: dict | None = None,
+                   validate: Callable[[str], bool] | None = None) -> str:
+    """
+    Try each tier of the task's cascade in turn and return the first output the
+    validator accepts. The last tier's output is returned even if rejected (the
+    caller's own checks/fallbacks still apply); its errors propagate.
+    """
+    chain = models_for(cfg, task)
+    for n, (tier, model) in enumerate(chain):
+        last = n == len(chain) - 1
+        try:
+            out = generate(model, prompt, options=options)
+        except Exception:
+            _record(task, tier, "errors")
+            if last:
+                raise
+            continue
+        ok = validate is None or validate(out)
+        _record(task, tier, "accepted" if ok else "rejected")
+        if ok or last:
+            return out
+    raise RuntimeError(f"no model configured for task '{task}'")  # unreachable: chain is never empty
@@ -0,0 +1,210 @@
+"""
+Resident job server: keeps fonts, LanguageTool, parsed configs/packs and the
+Ollama connection (plus the concurrency controller's measurements) warm across
+books.
+
+    POST   /jobs                {"config": "book.yml" | {...}, "pack": "", "priority": 0}
+    GET    /jobs                all jobs
+    GET    /jobs/<id>           status, stage, progress
+    DELETE /jobs/<id>           cancel (POST /jobs/<id>/cancel also works)
+    GET    /books/<slug>/       list artifacts
+    GET    /books/<slug>/<file> download an artifact
+    GET    /health
+"""
+from __future__ import annotations
+
+import heapq, itertools, json, mimetypes, threading, time, traceback, uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from .config import load_config, make_slug
+from .ollama_client import CONTROLLER, configure_concurrency
+from .pipeline import STAGES, JobCancelled, build_book
+from . import routing
+
+BOOKS = Path("books")
+STAGE_INDEX = {key: i for i, (key, _) in enumerate(STAGES)}
+
+# -------------------- job queue --------------------
+class JobQueue:
+    """
+    Priority queue of book jobs (higher priority first, FIFO within a priority).
+    Jobs for the same book slug never run at once, since they share books/<slug>/:
+    a later one waits until the running one finishes.
+    """
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._heap: list[tuple[int, int, str]] = []
+        self._seq = itertools.count()
+        self.jobs: dict[str, dict] = {}
+        self._cancel: dict[str, threading.Event] = {}
+        self._cfgs: dict[str, dict] = {}
+        self._running: set[str] = set()  # slugs being built
+
+    def submit(self, config: str | dict, pack: str = "", priority: int = 0) -> dict:
+        cfg = load_config(config, pack=pack)  # validate early so bad configs fail at submit time
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            "id": job_id, "status": "queued", "priority": priority,
+            "config": config if isinstance(config, str) else "<inline>", "pack": pack,
+            "slug": make_slug(cfg["topic"]), "stage": "", "progress": 0.0, "notes": [],
+            "error": "", "created": time.time(), "started": None, "finished": None,
+        }
+        with self._cond:
+            self.jobs[job_id] = job
+            self._cancel[job_id] = threading.Event()
+            self._cfgs[job_id] = cfg
+            heapq.heappush(self._heap, (-priority, next(self._seq), job_id))
+            self._cond.notify()
+        return job
+
+    def next(self) -> tuple[dict, dict, threading.Event]:
+        with self._cond:
+            while True:
+                held, picked = [], None
+                while self._heap and picked is None:
+                    item = heapq.heappop(self._heap)
+                    job = self.jobs[item[2]]
+                    if job["status"] != "queued":
+                        self._cfgs.pop(job["id"], None)  # cancelled while queued
+                    elif job["slug"] in self._running:
+                        held.append(item)
+                    else:
+                        picked = job
+                for item in held:
+                    heapq.heappush(self._heap, item)
+                if picked is not None:
+                    self._running.add(picked["slug"])
+                    picked["status"], picked["started"] = "running", time.time()
+                    return picked, self._cfgs.pop(picked["id"]), self._cancel[picked["id"]]
+                self._cond.wait()
+
+    def finish(self, job: dict) -> None:
+        """Release the job's slug so a queued job for the same book can start."""
+        with self._cond:
+            self._running.discard(job["slug"])
+            self._cond.notify_all()
+
+    def snapshot(self) -> list[dict]:
+        with self._cond:
+            return [dict(j) for j in self.jobs.values()]
+
+    def cancel(self, job_id: str) -> dict | None:
+        with self._cond:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            if job["status"] == "queued":
+                job["status"], job["finished"] = "cancelled", time.time()
+            elif job["status"] == "running":
+                job["status"] = "cancelling"
+            self._cancel[job_id].set()
+            return job
+
+def _worker(queue: JobQueue) -> None:
+    while True:
+        job, cfg, cancel = queue.next()
+        outdir = BOOKS / job["slug"]
+
+        def on_stage(key: str, label: str, target: str) -> None:
+            job["stage"] = label
+            job["progress"] = round(STAGE_INDEX[key] / len(STAGES), 3)
+
+        try:
+            build_book(cfg, outdir, on_stage=on_stage,
+                       on_note=job["notes"].append, cancel=cancel)
+            job["status"], job["progress"] = "done", 1.0
+        except JobCancelled:
+            job["status"] = "cancelled"
+        except Exception as e:
+            job["status"], job["error"] = "failed", f"{e}\n{traceback.format_exc(limit=3)}"
+        job["finished"] = time.time()
+        queue.finish(job)
+
+# -------------------- HTTP --------------------
+class Handler(BaseHTTPRequestHandler):
+    queue: JobQueue
+
+    def _json(self, code: int, data) -> None:
+        body = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _parts(self) -> list[str]:
+        return [p for p in self.path.split("?", 1)[0].split("/") if p]
+
+    def do_GET(self) -> None:
+        parts = self._parts()
+        if parts == ["health"]:
+            queued = sum(1 for j in self.queue.snapshot() if j["status"] == "queued")
+            return self._json(200, {"ok": True, "queued": queued, "concurrency": CONTROLLER.snapshot(),
+                                   "routing": routing.stats()})
+        if parts == ["jobs"]:
+            return self._json(200, self.queue.snapshot())
+        if len(parts) == 2 and parts[0] == "jobs":
+            job = self.queue.jobs.get(parts[1])
+            return self._json(200, job) if job else self._json(404, {"error": "no such job"})
+        if parts and parts[0] == "books" and len(parts) in (2, 3):
+            return self._serve_artifact(parts[1:])
+        self._json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        parts = self._parts()
+        if parts == ["jobs"]:
+            try:
+                n = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(n) or b"{}")
+                job = self.queue.submit(body["config"], pack=body.get("pack", ""),
+                                        priority=int(body.get("priority", 0)))
+            except Exception as e:
+                return self._json(400, {"error": f"bad job: {e}"})
+            return self._json(202, job)
+        if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "cancel":
+            return self._cancel(parts[1])
+        self._json(404, {"error": "not found"})
+
+    def do_DELETE(self) -> None:
+        parts = self._parts()
+        if len(parts) == 2 and parts[0] == "jobs":
+            return self._cancel(parts[1])
+        self._json(404, {"error": "not found"})
+
+    def _cancel(self, job_id: str) -> None:
+        job = self.queue.cancel(job_id)
+        self._json(200, job) if job else self._json(404, {"error": "no such job"})
+
+    def _serve_artifact(self, parts: list[str]) -> None:
+        root = BOOKS.resolve()
+        target = root.joinpath(*parts).resolve()
+        if root not in target.parents:
+            return self._json(403, {"error": "forbidden"})
+        if target.is_dir():
+            return self._json(200, sorted(p.name for p in target.iterdir() if p.is_file()))
+        if not target.is_file():
+            return self._json(404, {"error": "not found"})
+        data = target.read_bytes()
+        self.send_response(200)
+        self.send_header("Content-Type", mimetypes.guess_type(target.name)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+def serve(host: str = "127.0.0.1", port: int = 8765, workers: int = 1, base_cfg: dict | None = None) -> None:
+    # One controller for the whole process, so throughput measurements carry across jobs
+    configure_concurrency(base_cfg or {})
+    queue = JobQueue()
+    for _ in range(max(1, workers)):
+        threading.Thread(target=_worker, args=(queue,), daemon=True).start()
+    handler = type("BoundHandler", (Handler,), {"queue": queue})
+    httpd = ThreadingHTTPServer((host, port), handler)
+    print(f"Job server on http://{host}:{port} ({workers} worker(s))")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
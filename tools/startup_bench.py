@@ -0,0 +1,79 @@
+"""
+Import-time guard for the CLI.
+
+    python -m tools.startup_bench [--budget-ms 250] [--runs 7]
+
+Fails (exit 1) if importing main.py (or running a quick subcommand) pulls in a
+heavy stage dependency it does not need, or if the median wall time of
+`main.py --help` exceeds the budget. tests/test_startup.py runs the import checks.
+"""
+from __future__ import annotations
+
+import argparse, json, statistics, subprocess, sys, time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that must only load inside a subcommand
+HEAVY = ("rich", "PIL", "requests", "language_tool_python", "yaml", "markdown")
+# Quick subcommands and the heavy modules each one is allowed to load
+QUICK = {
+    "export": ("yaml", "rich", "markdown"),
+    "quality": ("yaml",),
+    "repetition": ("yaml",),
+}
+
+def _heavy(code: str) -> list[str]:
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True,
+                         capture_output=True, text=True).stdout
+    mods = json.loads(out.splitlines()[-1])
+    return sorted({m.split(".")[0] for m in mods if m.split(".")[0] in HEAVY})
+
+def imported_heavy_modules() -> list[str]:
+    return _heavy("import sys, json, main; print(json.dumps(sorted(sys.modules)))")
+
+def subcommand_heavy_modules(command: str) -> list[str]:
+    """Heavy modules a quick subcommand loads beyond QUICK[command]."""
+    # A missing config stops the command right after its lazy imports
+    code = ("import sys, json, main\n"
+            "try:\n"
+            f"    main.main([{command!r}, '--config', '__startup_bench_missing__.yml'])\n"
+            "except FileNotFoundError:\n"
+            "    pass\n"
+            "print(json.dumps(sorted(sys.modules)))")
+    return [m for m in _heavy(code) if m not in QUICK[command]]
+
+def help_wall_ms(runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "main.py", "--help"], cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL)
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=250.0)
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+
+    failed = False
+    heavy = imported_heavy_modules()
+    if heavy:
+        print(f"FAIL: `import main` loads {', '.join(heavy)}")
+        failed = True
+    for command in QUICK:
+        extra = subcommand_heavy_modules(command)
+        if extra:
+            print(f"FAIL: `main.py {command}` loads {', '.join(extra)}")
+            failed = True
+
+    median = help_wall_ms(args.runs)
+    status = "ok" if median <= args.budget_ms else "FAIL"
+    print(f"{status}: main.py --help median {median:.1f} ms (budget {args.budget_ms:.0f} ms, {args.runs} runs)")
+    failed = failed or median > args.budget_ms
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()